@@ -1,14 +1,19 @@
 import argparse
-import json
-
-import polars as pl
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 
 parser = argparse.ArgumentParser(description='Analyze benchmark results')
 parser.add_argument('results_dir', help='Path to results directory (e.g. results/2026-02-11T08-17-00)')
 RESULTS_DIR = parser.parse_args().results_dir
 
+# heavy imports after arg parsing so --help / bad args return instantly
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
+import polars as pl
+import polars.selectors as cs
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+from plotly_resampler import FigureResampler
+
 # NPG (Nature Publishing Group) palette
 COLORS = {
     'Elasticsearch': '#E64B35',
@@ -16,43 +21,51 @@ COLORS = {
 }
 
 
-def load_jsonl(filepath):
-    with open(filepath, 'r') as f:
-        return [json.loads(line) for line in f]
-
-
 def load_backend(results_dir, name):
-    data = load_jsonl(f'{results_dir}/{name}.jsonl')
-    df = pl.DataFrame(data)
+    # read_ndjson parses straight into Arrow columns, no Python dicts in between
+    df = pl.read_ndjson(f'{results_dir}/{name}.jsonl')
     df = df.with_columns(pl.col('timestamp').str.to_datetime(time_zone='UTC'))
     df = df.unnest('latency')
-    # μs → ms
-    us_cols = [c for c in df.columns if c.endswith('_us')]
-    df = df.with_columns([
-        (pl.col(c) / 1000).alias(c.replace('_us', '_ms'))
-        for c in us_cols
-    ])
-    return df
+    # μs → ms in one fused projection
+    df = df.with_columns(
+        (cs.ends_with('_us') / 1000).name.map(lambda c: c.replace('_us', '_ms'))
+    )
+    return df.drop(cs.ends_with('_us'))
 
 
 # load metadata for phase boundaries
-with open(f'{RESULTS_DIR}/metadata.json') as f:
-    metadata = json.load(f)
+with open(f'{RESULTS_DIR}/metadata.json', 'rb') as f:
+    metadata = orjson.loads(f.read())
 
-# load both backends and align to a common t=0
-backends = {
-    'Elasticsearch': load_backend(RESULTS_DIR, 'elasticsearch'),
-    'Qdrant': load_backend(RESULTS_DIR, 'qdrant'),
+# load both backends concurrently (read_ndjson releases the GIL) and align to a common t=0
+BACKEND_FILES = {
+    'Elasticsearch': 'elasticsearch',
+    'Qdrant': 'qdrant',
+}
+with ThreadPoolExecutor(max_workers=len(BACKEND_FILES)) as ex:
+    backends = dict(zip(
+        BACKEND_FILES,
+        ex.map(lambda n: load_backend(RESULTS_DIR, n), BACKEND_FILES.values()),
+    ))
+# use qstorm start as the common t=0 so phase lines align with data;
+# parse it and the phase boundaries in a single to_datetime pass
+phase_markers = {
+    'Heavy write ON':  metadata.get('t_heavy_start') or metadata['t_steady_end'],
+    'Heavy write OFF': metadata['t_heavy_end'],
 }
-# use qstorm start as the common t=0 so phase lines align with data
-t0 = pl.Series([metadata['t_qstorm_start']]).str.to_datetime(time_zone='UTC')[0]
+stamps = pl.Series(
+    [metadata['t_qstorm_start'], *phase_markers.values()]
+).str.to_datetime(time_zone='UTC')
+t0 = stamps[0]
+phase_times = dict(zip(phase_markers, stamps[1:]))
 for name in backends:
     backends[name] = backends[name].with_columns(
         ((pl.col('timestamp') - t0).dt.total_milliseconds() / 1000).alias('elapsed_s')
     )
 
 # panels: QPS, Mean Latency, p95, p99
-fig = make_subplots(
+# FigureResampler downsamples long runs (LTTB) before they hit the browser
+fig = FigureResampler(make_subplots(
     rows=2, cols=2,
     subplot_titles=(
         '<b>a</b>  QPS',
@@ -62,7 +75,7 @@ fig = make_subplots(
     ),
     horizontal_spacing=0.10,
     vertical_spacing=0.15,
-)
+), resampled_trace_prefix_suffix=('', ''), show_mean_aggregation_size=False)
 
 panels = [
     (1, 1, 'qps'),
@@ -73,22 +86,20 @@ panels = [
 
 for name, df in backends.items():
     color = COLORS[name]
+    # hand Plotly plain NumPy arrays — cheaper than Series indexing + serialization;
+    # convert each column once and reuse across subplots
+    x = df['elapsed_s'].to_numpy()
+    ys = {y_col: df[y_col].to_numpy() for _, _, y_col in panels}
     for i, (row, col, y_col) in enumerate(panels):
-        fig.add_trace(go.Scatter(
-            x=df['elapsed_s'], y=df[y_col],
+        fig.add_trace(go.Scattergl(
             mode='lines', name=name,
             line=dict(color=color, width=1.5),
             legendgroup=name,
             showlegend=(i == 0),
-        ), row=row, col=col)
+        ), hf_x=x, hf_y=ys[y_col], row=row, col=col)
 
 # phase boundaries as vertical lines
-phase_markers = {
-    'Heavy write ON':  metadata.get('t_heavy_start') or metadata['t_steady_end'],
-    'Heavy write OFF': metadata['t_heavy_end'],
-}
-for label, ts_str in phase_markers.items():
-    ts = pl.Series([ts_str]).str.to_datetime(time_zone='UTC')[0]
+for label, ts in phase_times.items():
     x_sec = (ts - t0).total_seconds()
     for row, col, _ in panels:
         fig.add_vline(
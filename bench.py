@@ -13,24 +13,32 @@ Usage:
 
 import argparse
 import datetime
-import json
 import logging
 import math
+import mmap
 import os
 import platform
+import shutil
 import signal
 import subprocess
 import sys
 import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field, asdict
+from functools import lru_cache
 from pathlib import Path
 
+import orjson
 import yaml
 
 log = logging.getLogger("bench")
 
+# libyaml-backed loader/dumper when available (5-10x faster than pure Python)
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YamlDumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 @dataclass
 class BenchConfig:
     pre_seed_logs: int = 100_000
@@ -49,20 +57,27 @@ class BenchConfig:
     @classmethod
     def from_yaml(cls, path: str) -> "BenchConfig":
         with open(path) as f:
-            data = yaml.safe_load(f)
+            data = yaml.load(f, Loader=_YamlLoader)
         return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
 
 
-def compute_seed_duration(emitter_dir: str, target_logs: int) -> int:
+def parse_emitter_config(emitter_dir: str) -> tuple[dict, float]:
     """
-    Read emitter config.yaml and compute how long to run to produce ~target_logs.
+    Parse emitter config.yaml once, returning the config and the total
+    log rate across services.
     """
     config_path = Path(emitter_dir) / "config.yaml"
     with open(config_path) as f:
-        raw = f.read()
-    # crude parse — env vars won't affect rates, which are plain numbers
-    cfg = yaml.safe_load(raw)
+        # crude parse — env vars won't affect rates, which are plain numbers
+        cfg = yaml.load(f, Loader=_YamlLoader)
     total_rate = sum(s["rate_per_sec"] for s in cfg.get("services", []))
+    return cfg, total_rate
+
+
+def compute_seed_duration(total_rate: float, target_logs: int) -> int:
+    """
+    Compute how long to run the emitter to produce ~target_logs.
+    """
     if total_rate <= 0:
         log.warning("Could not determine log rate, defaulting to 60s seed")
         return 60
@@ -88,6 +103,25 @@ class RunMetadata:
     t_end: str = ""
 
 
+def count_lines(path: Path) -> int:
+    """
+    Count newlines in a file via mmap — much faster than iterating
+    Python line objects on multi-MB JSONL outputs.
+    """
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return 0
+        with mm:
+            count = 0
+            pos = mm.find(b"\n")
+            while pos != -1:
+                count += 1
+                pos = mm.find(b"\n", pos + 1)
+            return count
+
+
 def now_iso() -> str:
     return datetime.datetime.now(datetime.timezone.utc).isoformat()
 
@@ -95,10 +129,48 @@ def now_iso() -> str:
 # track active subprocesses for cleanup on Ctrl-C
 _active_procs: list[subprocess.Popen] = []
 
+# set by isolate_driver_cpu; argv prefix giving children the non-driver cores
+_child_cpu_prefix: list[str] = []
+
+
+def isolate_driver_cpu() -> None:
+    """
+    Keep the bench driver from contending with the measured processes:
+    pin this process to one allowed core and launch children under
+    taskset on the rest. Linux only; a no-op when fewer than two cores
+    are allowed or when the container forbids affinity changes.
+    """
+    global _child_cpu_prefix
+    if platform.system() != "Linux":
+        return
+    # the allowed cpuset, not os.cpu_count(): in a confined container the
+    # host may have cores this process can never be scheduled on
+    allowed = os.sched_getaffinity(0)
+    if len(allowed) < 2:
+        return
+    # without taskset the children would inherit the driver's one-core
+    # mask, serializing the whole workload — skip the pin entirely
+    if not shutil.which("taskset"):
+        log.warning("taskset not found, skipping driver CPU isolation")
+        return
+    driver_cpu = min(allowed)
+    try:
+        os.sched_setaffinity(0, {driver_cpu})
+    except OSError as e:
+        log.warning("Could not isolate driver CPU: %s", e)
+        return
+    # taskset (not an inherited preexec hook) so the affinity applies to the
+    # whole child tree, including the binary cargo run execs
+    child_cpus = ",".join(str(c) for c in sorted(allowed - {driver_cpu}))
+    _child_cpu_prefix = ["taskset", "-c", child_cpus]
+    log.info("Pinned bench driver to CPU%d", driver_cpu)
+
 
+@lru_cache(maxsize=1)
 def _make_env() -> dict:
     """
     Build subprocess environment: inherit current env + source .env file.
+    Cached so repeat launches don't re-read .env from disk.
     """
     env = os.environ.copy()
     env_file = Path(".env")
@@ -111,6 +183,8 @@ def _make_env() -> dict:
                 line = line[7:]
             key, _, value = line.partition("=")
             env[key.strip()] = value.strip()
+    # keep the emitter at info-level logging unless the caller overrides it
+    env.setdefault("RUST_LOG", "info")
     return env
 
 
@@ -147,29 +221,47 @@ class _StderrWatcher:
         return "".join(self._lines)
 
 
-def start_emitter(config: BenchConfig, duration_secs: int, env: dict) -> subprocess.Popen:
+def start_emitter(
+    config: BenchConfig,
+    duration_secs: int,
+    env: dict,
+    out_dir: Path,
+    label: str,
+) -> subprocess.Popen:
     """
     Start the emitter process with a specific duration.
+
+    stdout goes to a log file and stderr is piped (callers must attach a
+    _StderrWatcher) so neither stream can fill its pipe buffer and block
+    the emitter mid-measurement.
     """
     emitter_dir = Path(config.emitter_dir).resolve()
     cmd = [
+        *_child_cpu_prefix,
         "cargo", "run", "--release",
         "--features", config.emitter_features,
         "--", "--duration-secs", str(duration_secs),
     ]
     log.info("Starting emitter (duration=%ds): %s", duration_secs, " ".join(cmd))
+    stdout_fh = open(out_dir / f"emitter.{label}.stdout.log", "ab")
     proc = subprocess.Popen(
         cmd,
         cwd=str(emitter_dir),
         env=env,
-        stdout=subprocess.PIPE,
+        stdout=stdout_fh,
         stderr=subprocess.PIPE,
     )
+    proc._output_fh = stdout_fh  # type: ignore[attr-defined]
     _active_procs.append(proc)
     return proc
 
 
-def wait_for_emitter(proc: subprocess.Popen, label: str, timeout: int) -> None:
+def wait_for_emitter(
+    proc: subprocess.Popen,
+    label: str,
+    timeout: int,
+    watcher: "_StderrWatcher | None" = None,
+) -> None:
     """
     Wait for emitter to finish with a timeout.
     """
@@ -178,7 +270,11 @@ def wait_for_emitter(proc: subprocess.Popen, label: str, timeout: int) -> None:
         proc.wait(timeout=timeout)
         log.info("Emitter [%s] exited with code %d", label, proc.returncode)
         if proc.returncode != 0:
-            stderr = proc.stderr.read().decode() if proc.stderr else ""
+            if watcher is not None:
+                watcher.join()
+                stderr = watcher.output
+            else:
+                stderr = proc.stderr.read().decode() if proc.stderr else ""
             log.error("Emitter [%s] failed with stderr:\n%s", label, stderr)
     except subprocess.TimeoutExpired:
         log.warning("Emitter [%s] did not finish in time, terminating", label)
@@ -189,6 +285,8 @@ def wait_for_emitter(proc: subprocess.Popen, label: str, timeout: int) -> None:
             proc.kill()
             proc.wait()
     finally:
+        if hasattr(proc, "_output_fh"):
+            proc._output_fh.close()  # type: ignore[attr-defined]
         if proc in _active_procs:
             _active_procs.remove(proc)
 
@@ -201,6 +299,9 @@ def start_qstorm(
 ) -> subprocess.Popen:
     """
     Start a qstorm process in headless mode, writing JSONL to output_file.
+
+    stderr goes to a sibling log file rather than an undrained pipe, which
+    would block qstorm once the 64KB pipe buffer fills.
     """
     configs_dir = Path(config.qstorm_configs_dir).resolve()
     backend_cfg = config.backends[backend_name]
@@ -208,6 +309,7 @@ def start_qstorm(
     queries_path = str(configs_dir / backend_cfg["queries"])
 
     cmd = [
+        *_child_cpu_prefix,
         "qstorm",
         "-c", config_path,
         "-q", queries_path,
@@ -216,9 +318,12 @@ def start_qstorm(
         "--bursts", "0",
     ]
     log.info("Starting qstorm [%s]: %s → %s", backend_name, " ".join(cmd), output_file)
-    fh = open(output_file, "w")
-    proc = subprocess.Popen(cmd, stdout=fh, stderr=subprocess.PIPE, env=env)
+    # qstorm writes to the fd directly; the Python handle just owns it
+    fh = open(output_file, "wb")
+    err_fh = open(output_file.with_suffix(".stderr.log"), "ab")
+    proc = subprocess.Popen(cmd, stdout=fh, stderr=err_fh, env=env)
     proc._output_fh = fh  # type: ignore[attr-defined]
+    proc._stderr_fh = err_fh  # type: ignore[attr-defined]
     _active_procs.append(proc)
     return proc
 
@@ -239,6 +344,8 @@ def stop_qstorm(proc: subprocess.Popen, backend_name: str) -> None:
     finally:
         if hasattr(proc, "_output_fh"):
             proc._output_fh.close()  # type: ignore[attr-defined]
+        if hasattr(proc, "_stderr_fh"):
+            proc._stderr_fh.close()  # type: ignore[attr-defined]
         if proc in _active_procs:
             _active_procs.remove(proc)
 
@@ -246,6 +353,9 @@ def stop_qstorm(proc: subprocess.Popen, backend_name: str) -> None:
 def check_services_healthy() -> bool:
     """
     Quick health check that ES and Qdrant are reachable.
+
+    Probes run concurrently so the worst case is one 5s timeout, not one
+    per service.
     """
     import urllib.request
     import base64
@@ -257,24 +367,29 @@ def check_services_healthy() -> bool:
             "Basic " + base64.b64encode(b"elastic:changeme").decode(),
         ),
     }
-    all_ok = True
-    for name, (url, auth) in checks.items():
+
+    def _probe(name: str, url: str, auth: str | None) -> bool:
         try:
             req = urllib.request.Request(url)
             if auth:
                 req.add_header("Authorization", auth)
             resp = urllib.request.urlopen(req, timeout=5)
             log.info("  %s: OK (%d)", name, resp.status)
+            return True
         except Exception as e:
             log.error("  %s: FAILED (%s)", name, e)
-            all_ok = False
-    return all_ok
+            return False
+
+    with ThreadPoolExecutor(max_workers=len(checks)) as ex:
+        results = ex.map(lambda kv: _probe(kv[0], *kv[1]), checks.items())
+        return all(list(results))
 
 
 def run_benchmark(config: BenchConfig, skip_load: bool = False) -> None:
     run_name = datetime.datetime.now().strftime("%Y-%m-%dT%H-%M-%S")
     out_dir = Path(config.results_dir).resolve() / run_name
     out_dir.mkdir(parents=True, exist_ok=True)
+    jsonl_paths = {b: out_dir / f"{b}.jsonl" for b in config.backends}
 
     log.info("=" * 60)
     log.info("Benchmark run: %s", run_name)
@@ -283,12 +398,9 @@ def run_benchmark(config: BenchConfig, skip_load: bool = False) -> None:
 
     env = _make_env()
 
-    # compute seed duration from emitter config
-    seed_secs = compute_seed_duration(config.emitter_dir, config.pre_seed_logs)
-    emitter_cfg = yaml.safe_load(
-        (Path(config.emitter_dir) / "config.yaml").read_text()
-    )
-    total_rate = sum(s["rate_per_sec"] for s in emitter_cfg.get("services", []))
+    # compute seed duration from emitter config (parsed once)
+    _, total_rate = parse_emitter_config(config.emitter_dir)
+    seed_secs = compute_seed_duration(total_rate, config.pre_seed_logs)
 
     metadata = RunMetadata(
         config=asdict(config),
@@ -315,8 +427,11 @@ def run_benchmark(config: BenchConfig, skip_load: bool = False) -> None:
             "Phase 0: Pre-seeding ~%d logs (%ds at ~%.0f logs/s)...",
             config.pre_seed_logs, seed_secs, total_rate,
         )
-        emitter_seed = start_emitter(config, seed_secs, env)
-        wait_for_emitter(emitter_seed, "pre-seed", timeout=seed_secs + 60)
+        emitter_seed = start_emitter(config, seed_secs, env, out_dir, "pre-seed")
+        seed_watcher = _StderrWatcher(emitter_seed, "Emitter running")
+        wait_for_emitter(
+            emitter_seed, "pre-seed", timeout=seed_secs + 60, watcher=seed_watcher,
+        )
         metadata.t_seed_done = now_iso()
 
         log.info("Sleeping 5s for index settle...")
@@ -324,10 +439,16 @@ def run_benchmark(config: BenchConfig, skip_load: bool = False) -> None:
 
     # --- Phase 1: Start qstorm ---
     log.info("Phase 1: Starting qstorm against all backends...")
-    qstorm_procs = {}
-    for backend_name in config.backends:
-        output_file = out_dir / f"{backend_name}.jsonl"
-        qstorm_procs[backend_name] = start_qstorm(config, backend_name, output_file, env)
+    # launch in parallel so both processes start within a few ms of the
+    # single t_qstorm_start stamp below
+    with ThreadPoolExecutor(max_workers=len(config.backends)) as ex:
+        qstorm_procs = dict(zip(
+            config.backends,
+            ex.map(
+                lambda b: start_qstorm(config, b, jsonl_paths[b], env),
+                config.backends,
+            ),
+        ))
     metadata.t_qstorm_start = now_iso()
 
     # --- Phase 2: Steady-state ---
@@ -338,10 +459,15 @@ def run_benchmark(config: BenchConfig, skip_load: bool = False) -> None:
 
     # --- Phase 3+4: Heavy write ---
     log.info("Phase 3: Starting heavy write load (%ds)...", config.heavy_write_secs)
-    emitter_heavy = start_emitter(config, config.heavy_write_secs, env)
+    emitter_heavy = start_emitter(
+        config, config.heavy_write_secs, env, out_dir, "heavy-write",
+    )
     watcher = _StderrWatcher(emitter_heavy, "Emitter running")
     log.info("Phase 4: Heavy write measurement in progress...")
-    wait_for_emitter(emitter_heavy, "heavy-write", timeout=config.heavy_write_secs + 60)
+    wait_for_emitter(
+        emitter_heavy, "heavy-write",
+        timeout=config.heavy_write_secs + 60, watcher=watcher,
+    )
     watcher.join()
     metadata.t_heavy_start = watcher.marker_time or metadata.t_steady_end
     metadata.t_heavy_end = now_iso()
@@ -364,20 +490,18 @@ def run_benchmark(config: BenchConfig, skip_load: bool = False) -> None:
 
     # --- Write outputs ---
     metadata_path = out_dir / "metadata.json"
-    with open(metadata_path, "w") as f:
-        json.dump(asdict(metadata), f, indent=2)
+    metadata_path.write_bytes(orjson.dumps(asdict(metadata), option=orjson.OPT_INDENT_2))
 
     config_copy = out_dir / "bench_config.yaml"
     with open(config_copy, "w") as f:
-        yaml.dump(asdict(config), f, default_flow_style=False)
+        yaml.dump(asdict(config), f, Dumper=_YamlDumper, default_flow_style=False)
 
     # --- Summary ---
     log.info("=" * 60)
     log.info("Benchmark complete: %s", run_name)
     log.info("Results: %s", out_dir)
-    for backend_name in config.backends:
-        jsonl_path = out_dir / f"{backend_name}.jsonl"
-        lines = sum(1 for _ in open(jsonl_path)) if jsonl_path.exists() else 0
+    for backend_name, jsonl_path in jsonl_paths.items():
+        lines = count_lines(jsonl_path) if jsonl_path.exists() else 0
         log.info("  %s: %d bursts recorded", backend_name, lines)
     log.info("=" * 60)
 
@@ -425,7 +549,8 @@ def main():
     config = BenchConfig.from_yaml(args.config)
 
     if args.dry_run:
-        seed_secs = compute_seed_duration(config.emitter_dir, config.pre_seed_logs)
+        _, total_rate = parse_emitter_config(config.emitter_dir)
+        seed_secs = compute_seed_duration(total_rate, config.pre_seed_logs)
         total = seed_secs + 5 + config.steady_state_secs + config.heavy_write_secs + config.recovery_secs
         print("=== DRY RUN ===")
         print(f"Pre-seed:      ~{config.pre_seed_logs:,} logs ({seed_secs}s)")
@@ -436,6 +561,7 @@ def main():
         print(f"Backends:      {list(config.backends.keys())}")
         return
 
+    isolate_driver_cpu()
     run_benchmark(config, skip_load=args.skip_load)
 
 